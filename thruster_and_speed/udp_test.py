@@ -19,19 +19,89 @@ Heartbeat Port (8889):
 
 Mode: 0=RC, 1=WiFi
 Timeout: 2s without PING/command = Arduino switches to RC mode
+
+Receive thread scheduling (Linux):
+- The receive thread asks for SCHED_RR priority 20 so CPU load on the host
+  does not show up as latency spikes; this needs CAP_SYS_NICE, e.g.
+  sudo setcap cap_sys_nice+ep $(readlink -f $(which python3))
+  Without it the request is skipped silently.
+- --rx-cpu N pins the receive thread to CPU N.
 """
 
+import os
+import queue
+import selectors
 import socket
+import sys
 import threading
 import time
-import argparse
-from dataclasses import dataclass
+import array
+import functools
+import itertools
+import random
+import re
 from datetime import datetime
-from typing import Optional
+from typing import NamedTuple, Optional
+
+# Clock for all elapsed-time and timeout math; unlike time.time() it never
+# jumps on NTP/DST adjustments. StatusData/FlowData timestamps use it too.
+_now = time.monotonic
+
+# HEARTBEAT arrival-time ring size (power of two, indexed with a mask)
+_HB_RING_SIZE = 4096
+_HB_RING_MASK = _HB_RING_SIZE - 1
+
+# Default kernel receive buffer per socket; absorbs bursts while the
+# receive thread is descheduled (Linux caps it at net.core.rmem_max). Too
+# small a buffer drops HEARTBEATs during GIL or stdout stalls, which the
+# heartbeat test then reports as missed even though the Arduino sent them.
+_RCVBUF_BYTES = 2 * 1024 * 1024
+
+# Linux socket priority for command traffic (0-6 need no privileges)
+_SO_PRIORITY = getattr(socket, 'SO_PRIORITY', None)
+_CONTROL_PRIORITY = 6
+
+# Wire formats; bytes %-formatting skips the str -> bytes encode step
+_CMD_FMT = b"C %d %d\n"
+_PING_BYTES = b"PING\n"
+
+# An unchanged command is re-sent at most this often (seconds); keeps the
+# Arduino's 2s command/online timeout refreshed without redundant traffic
+_CMD_REFRESH_S = 0.9
+
+# hold_test_mode forces a transmit on every Nth 100ms tick, so the held
+# target goes out at least every 0.5s and several consecutive lost
+# datagrams are tolerated before the Arduino's 2s failsafe
+_HOLD_FORCE_EVERY = 5
+
+# Pulse widths used by the test presets; their command bytes are prebuilt
+_PRESET_PULSES = (1100, 1300, 1400, 1500, 1600, 1700, 1800, 1900)
+
+# Status ring size for the receive thread -> test mode SPSC queue (power of two)
+_STATUS_RING_SIZE = 64
+_STATUS_RING_MASK = _STATUS_RING_SIZE - 1
 
+# Largest datagram accepted from the Arduino (longest message is ~40 bytes)
+_RX_BUFSIZE = 256
 
-@dataclass
-class StatusData:
+# Exact HEARTBEAT payloads, compared against the receive buffer without copying
+_HEARTBEAT_MSGS = (b'HEARTBEAT\n', b'HEARTBEAT\r\n', b'HEARTBEAT')
+
+# Compiled matchers for data messages; they run on the raw receive buffer
+# and their groups are the byte tokens fed to int()/float()
+_STATUS_RE = re.compile(rb'S +(-?\d+) +(-?\d+) +(-?\d+)\s*\Z')
+_FLOW_RE = re.compile(rb'F +(\S+) +(\S+) +(\S+) +(\S+)\s*\Z')
+
+# Console templates for received messages (bound .format methods). The
+# receive thread queues (template, args) and the logger thread formats them.
+_HEARTBEAT_FMT = "[HEARTBEAT] #{} from {}:{}".format
+_HEARTBEAT_DATA_FMT = "[HEARTBEAT] #{} from {}".format
+_STATUS_FMT = "[STATUS] Mode={} L={} R={}us".format
+_FLOW_FMT = "[FLOW] {:.2f}Hz, {:.2f}L/min, {:.4f}m/s, Total={:.3f}L".format
+_UNKNOWN_FMT = "[UNKNOWN] {} from {}:{}".format
+
+
+class StatusData(NamedTuple):
     """Container for status data from Arduino"""
     mode: int = 0  # 0=RC, 1=WiFi
     left_us: int = 1500
@@ -43,8 +113,7 @@ class StatusData:
         return "WiFi" if self.mode == 1 else "RC"
 
 
-@dataclass
-class FlowData:
+class FlowData(NamedTuple):
     """Container for flow meter data from Arduino"""
     freq_hz: float = 0.0
     flow_lmin: float = 0.0
@@ -53,51 +122,186 @@ class FlowData:
     timestamp: float = 0.0
 
 
+def _make_sendmmsg():
+    """Wrap Linux sendmmsg(2) via ctypes; returns None where it is unavailable
+
+    The returned function sends every payload on a connected socket in a
+    single syscall and returns the number of datagrams sent.
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc_sendmmsg = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+
+    class IOVec(ctypes.Structure):
+        _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+    class MsgHdr(ctypes.Structure):
+        _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+                    ('msg_iov', ctypes.POINTER(IOVec)), ('msg_iovlen', ctypes.c_size_t),
+                    ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                    ('msg_flags', ctypes.c_int)]
+
+    class MMsgHdr(ctypes.Structure):
+        _fields_ = [('msg_hdr', MsgHdr), ('msg_len', ctypes.c_uint)]
+
+    libc_sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(MMsgHdr), ctypes.c_uint, ctypes.c_int]
+    libc_sendmmsg.restype = ctypes.c_int
+
+    def sendmmsg(sock: socket.socket, payloads: list) -> int:
+        count = len(payloads)
+        bufs = [ctypes.create_string_buffer(p, len(p)) for p in payloads]
+        iov = (IOVec * count)()
+        msgs = (MMsgHdr * count)()
+        for i, buf in enumerate(bufs):
+            iov[i].iov_base = ctypes.addressof(buf)
+            iov[i].iov_len = len(payloads[i])
+            msgs[i].msg_hdr.msg_iov = ctypes.pointer(iov[i])
+            msgs[i].msg_hdr.msg_iovlen = 1
+        sent = libc_sendmmsg(sock.fileno(), msgs, count, 0)
+        if sent < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return sent
+
+    return sendmmsg
+
+
+_sendmmsg = _make_sendmmsg()
+
+
 class UDPTestClient:
     """UDP client for testing Arduino thruster communication with data + heartbeat ports"""
 
     def __init__(self, arduino_ip: str = "192.168.50.100", data_port: int = 8888,
-                 heartbeat_port: int = 8889):
+                 heartbeat_port: int = 8889, rx_cpu: Optional[int] = None,
+                 quiet: bool = False, rcvbuf: int = _RCVBUF_BYTES):
         self.arduino_ip = arduino_ip
         self.data_port = data_port
         self.heartbeat_port = heartbeat_port
+        self.rx_cpu = rx_cpu  # CPU to pin the receive thread to (Linux only)
+        self.quiet = quiet  # Suppress per-packet receive output (benchmarking)
+        self.rcvbuf = rcvbuf  # Requested SO_RCVBUF for both sockets
+        self._arduino_addr = (arduino_ip, data_port)
+        self._ping_addr = (arduino_ip, heartbeat_port)
+        # Encoded "C <left> <right>\n" datagrams for every preset pair
+        self._cmd_cache = {
+            (l, r): _CMD_FMT % (l, r)
+            for l in _PRESET_PULSES for r in _PRESET_PULSES
+        }
         self.data_sock: Optional[socket.socket] = None
         self.heartbeat_sock: Optional[socket.socket] = None
+        # Socket pair used by disconnect() to wake the blocking receive loop
+        self._wake_r: Optional[socket.socket] = None
+        self._wake_w: Optional[socket.socket] = None
+        self._selector: Optional[selectors.BaseSelector] = None
         self.running = False
         self.receive_thread: Optional[threading.Thread] = None
         self.keep_alive_thread: Optional[threading.Thread] = None
+        # Receive-path messages are printed by a separate logger thread so
+        # stdout writes never stall the receive loop; None stops the logger
+        self._log_q: queue.SimpleQueue = queue.SimpleQueue()
+        self.log_thread: Optional[threading.Thread] = None
+        # Keep-alive bookkeeping: time of the last datagram sent to the Arduino
+        # (any command or PING resets its 2s timeout)
+        self._last_send_t = _now()
+        # Last transmitted (left, right) command and when it went out
+        self._last_cmd: Optional[tuple] = None
+        self._last_cmd_t = 0.0
+        # Shutdown signal set by disconnect(); background waits end on it
+        self._stop = threading.Event()
 
         # Statistics
         self.heartbeat_count = 0
         self.status_count = 0
         self.flow_count = 0
-        self.last_heartbeat_time = 0.0
-        self.last_status_time = 0.0
-        self.last_receive_time = 0.0
+        self.commands_sent = 0  # Command datagrams actually transmitted (not coalesced)
+        # The receive thread publishes counters with a single store of the next
+        # sequence value instead of a read-modify-write on the shared attribute
+        self._heartbeat_seq = itertools.count(1)
+        self._status_seq = itertools.count(1)
+        self._flow_seq = itertools.count(1)
+        self.last_heartbeat_time_ns = 0  # time.monotonic_ns() of last HEARTBEAT
+        # Ring of HEARTBEAT arrival times (monotonic ns); _hb_idx counts writes
+        self._hb_timestamps = array.array('q', bytes(8 * _HB_RING_SIZE))
+        self._hb_idx = 0
+        # Guards the heartbeat state above and is notified on every HEARTBEAT
+        self._hb_cv = threading.Condition()
+        # Set on the first HEARTBEAT so callers can block until the Arduino answers
+        self._online_event = threading.Event()
+        self.last_status_time = 0.0  # _now() of last status
+        self.last_receive_time = 0.0  # _now() of last datagram
 
         # Latest data
         self.latest_status = StatusData()
         self.latest_flow = FlowData()
+        # Set by the receive thread whenever a new status is stored
+        self._status_event = threading.Event()
+        # Single-producer/single-consumer ring so a slow consumer still sees
+        # every status; only the receive thread advances _status_head and
+        # only drain_statuses() advances _status_tail
+        self._status_ring: list = [None] * _STATUS_RING_SIZE
+        self._status_head = 0
+        self._status_tail = 0
 
         # Heartbeat timeout detection (Arduino sends every 1s)
-        self.heartbeat_timeout = 2.0  # Consider offline if no heartbeat for 2s
+        self.heartbeat_timeout_ns = 2_000_000_000  # Consider offline if no heartbeat for 2s
+
+        # Reusable receive buffer; handlers get a memoryview slice of it
+        self._rxbuf = bytearray(_RX_BUFSIZE)
+        self._rxmv = memoryview(self._rxbuf)
+
+        # Message handlers keyed by the first byte of the datagram
+        self._dispatch = {
+            ord('H'): self._handle_heartbeat,
+            ord('S'): self._handle_status,
+            ord('F'): self._handle_flow,
+        }
 
     def connect(self) -> bool:
-        """Create and bind two UDP sockets (data, heartbeat)"""
+        """Create and bind two UDP sockets (data, heartbeat)
+
+        The two sockets cannot be merged into one: the Arduino sends status/flow
+        and HEARTBEAT to different local ports, and a socket binds a single
+        port. Both are polled through one selector instead.
+        """
         try:
             # Data socket (commands, status, flow)
             self.data_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.data_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
             self.data_sock.bind(('', 0))
-            self.data_sock.settimeout(0.1)  # Non-blocking with timeout
+            # Fix the peer once so sends skip per-call address handling
+            self.data_sock.connect(self._arduino_addr)
+            # Readiness comes from the selector, so no receive timeout is needed
+            self.data_sock.setblocking(False)
+            if _SO_PRIORITY is not None:
+                # Queue control traffic ahead of bulk traffic in the local qdisc
+                self.data_sock.setsockopt(socket.SOL_SOCKET, _SO_PRIORITY, _CONTROL_PRIORITY)
             data_local_port = self.data_sock.getsockname()[1]
 
             # Heartbeat socket (PING keepalive + HEARTBEAT broadcast)
             self.heartbeat_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.heartbeat_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
             self.heartbeat_sock.bind(('', self.heartbeat_port))
-            self.heartbeat_sock.settimeout(0.1)  # Non-blocking with timeout
+            self.heartbeat_sock.setblocking(False)
+
+            # Wake-up pair so the receive loop can block without a poll timeout
+            self._wake_r, self._wake_w = socket.socketpair()
 
             print(f"[INFO] Data socket: local port {data_local_port} <-> {self.arduino_ip}:{self.data_port}")
             print(f"[INFO] Heartbeat socket: local port {self.heartbeat_port} <- broadcast/{self.arduino_ip}:{self.heartbeat_port}")
+            # Linux reports double the granted size (bookkeeping overhead)
+            for name, sock in (("Data", self.data_sock), ("Heartbeat", self.heartbeat_sock)):
+                granted = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+                print(f"[INFO] {name} receive buffer: {granted} bytes (requested {self.rcvbuf})")
+                if granted < self.rcvbuf:
+                    print(f"[WARN] {name} receive buffer capped by the kernel; "
+                          f"raise net.core.rmem_max to allow {self.rcvbuf} bytes")
             return True
         except socket.error as e:
             print(f"[ERROR] Failed to create sockets: {e}")
@@ -106,39 +310,100 @@ class UDPTestClient:
     def disconnect(self):
         """Stop receiving and close both sockets"""
         self.running = False
+        self._stop.set()
+        if self._wake_w:
+            try:
+                self._wake_w.send(b'\0')
+            except socket.error:
+                pass
         if self.receive_thread:
             self.receive_thread.join(timeout=1.0)
         if self.keep_alive_thread:
             self.keep_alive_thread.join(timeout=1.0)
+        if self.log_thread:
+            self._log_q.put(None)
+            self.log_thread.join(timeout=1.0)
+            self.log_thread = None
+        if self._selector:
+            self._selector.close()
+            self._selector = None
         if self.data_sock:
             self.data_sock.close()
             self.data_sock = None
         if self.heartbeat_sock:
             self.heartbeat_sock.close()
             self.heartbeat_sock = None
+        if self._wake_r:
+            self._wake_r.close()
+            self._wake_w.close()
+            self._wake_r = self._wake_w = None
 
-    def send_command(self, left_us: int, right_us: int) -> bool:
+    def send_command(self, left_us: int, right_us: int, force: bool = False) -> bool:
         """Send thruster command to Arduino (on data port)
 
+        Repeats of the last command within _CMD_REFRESH_S are coalesced
+        (not transmitted) unless force is set, so loops that re-send the
+        same target at 10Hz still refresh it about once a second.
+
         Args:
             left_us: Left thruster pulse width in microseconds (1100-1900)
             right_us: Right thruster pulse width in microseconds (1100-1900)
+            force: Transmit even if the same command was just sent
 
         Returns:
-            True if command was sent successfully
+            True if command was sent successfully or coalesced
         """
         if not self.data_sock:
             print("[ERROR] Data socket not connected")
             return False
 
-        command = f"C {left_us} {right_us}\n"
+        pair = (left_us, right_us)
+        now = _now()
+        if not force and pair == self._last_cmd and now - self._last_cmd_t < _CMD_REFRESH_S:
+            return True
+
+        command = self._cmd_cache.get(pair) or _CMD_FMT % pair
         try:
-            self.data_sock.sendto(command.encode(), (self.arduino_ip, self.data_port))
+            self.data_sock.send(command)
+            self._last_send_t = self._last_cmd_t = now
+            self._last_cmd = pair
+            self.commands_sent += 1
             return True
         except socket.error as e:
             print(f"[ERROR] Failed to send command: {e}")
             return False
 
+    def send_command_burst(self, commands: list) -> int:
+        """Send several thruster commands back-to-back (on data port)
+
+        Uses a single sendmmsg() syscall on Linux, one send() per command elsewhere.
+
+        Args:
+            commands: List of (left_us, right_us) pairs
+
+        Returns:
+            Number of commands sent
+        """
+        if not self.data_sock:
+            print("[ERROR] Data socket not connected")
+            return 0
+
+        payloads = [self._cmd_cache.get(pair) or _CMD_FMT % pair for pair in commands]
+        try:
+            if _sendmmsg:
+                sent = _sendmmsg(self.data_sock, payloads)
+            else:
+                for payload in payloads:
+                    self.data_sock.send(payload)
+                sent = len(payloads)
+            self._last_send_t = self._last_cmd_t = _now()
+            self._last_cmd = commands[sent - 1] if sent else None
+            self.commands_sent += sent
+            return sent
+        except socket.error as e:
+            print(f"[ERROR] Failed to send command burst: {e}")
+            return 0
+
     def send_handshake(self) -> bool:
         """Send a PING handshake command to trigger Arduino response
 
@@ -161,115 +426,226 @@ class UDPTestClient:
             return False
 
         try:
-            self.heartbeat_sock.sendto(b"PING\n", (self.arduino_ip, self.heartbeat_port))
+            self.heartbeat_sock.sendto(_PING_BYTES, self._ping_addr)
+            self._last_send_t = _now()
             return True
         except socket.error as e:
             print(f"[ERROR] Failed to send PING: {e}")
             return False
 
-    def _parse_status(self, data: str) -> Optional[StatusData]:
-        """Parse status message: S <mode> <left_us> <right_us>"""
-        parts = data.split()
-        if len(parts) == 4 and parts[0] == 'S':
-            try:
-                return StatusData(
-                    mode=int(parts[1]),
-                    left_us=int(parts[2]),
-                    right_us=int(parts[3]),
-                    timestamp=time.time()
-                )
-            except ValueError:
-                pass
-        return None
+    def _parse_status(self, data: memoryview, timestamp: float) -> Optional[StatusData]:
+        """Parse status message: S <mode> <left_us> <right_us>
 
-    def _parse_flow(self, data: str) -> Optional[FlowData]:
+        Matches the raw datagram without copying; int() accepts the bytes
+        groups directly.
+        """
+        m = _STATUS_RE.match(data)
+        if m is None:
+            return None
+        mode, left, right = m.groups()
+        # Positional in field order: mode, left_us, right_us, timestamp
+        return StatusData(int(mode), int(left), int(right), timestamp)
+
+    def _parse_flow(self, data: memoryview, timestamp: float) -> Optional[FlowData]:
         """Parse flow data message: F <freq_hz> <flow_lmin> <velocity_ms> <total_liters>"""
-        parts = data.split()
-        if len(parts) == 5 and parts[0] == 'F':
-            try:
-                return FlowData(
-                    freq_hz=float(parts[1]),
-                    flow_lmin=float(parts[2]),
-                    velocity_ms=float(parts[3]),
-                    total_liters=float(parts[4]),
-                    timestamp=time.time()
-                )
-            except ValueError:
-                pass
-        return None
+        m = _FLOW_RE.match(data)
+        if m is None:
+            return None
+        freq, flow, velocity, total = m.groups()
+        try:
+            # Positional in field order: freq_hz, flow_lmin, velocity_ms,
+            # total_liters, timestamp
+            return FlowData(float(freq), float(flow), float(velocity), float(total), timestamp)
+        except ValueError:
+            return None
+
+    def _handle_heartbeat(self, data: memoryview, addr, tag: str):
+        """Handle HEARTBEAT message"""
+        if data not in _HEARTBEAT_MSGS:
+            self._handle_unknown(data, addr, tag)
+            return
+        self._record_heartbeat(addr, tag)
+
+    def _record_heartbeat(self, addr, tag: str):
+        """Count an already validated HEARTBEAT and wake heartbeat waiters"""
+        t_ns = time.monotonic_ns()
+        with self._hb_cv:
+            self.heartbeat_count = next(self._heartbeat_seq)
+            self.last_heartbeat_time_ns = t_ns
+            self._hb_timestamps[self._hb_idx & _HB_RING_MASK] = t_ns
+            self._hb_idx += 1
+            self._hb_cv.notify_all()
+        if not self._online_event.is_set():
+            self._online_event.set()
+        if self.quiet:
+            return
+        if tag == 'heartbeat':
+            self._log_q.put_nowait((_HEARTBEAT_FMT, (self.heartbeat_count, addr[0], addr[1])))
+        else:
+            self._log_q.put_nowait((_HEARTBEAT_DATA_FMT, (self.heartbeat_count, addr[0])))
+
+    def _handle_status(self, data: memoryview, addr, tag: str):
+        """Handle status message: S <mode> <left_us> <right_us>"""
+        now = self.last_receive_time
+        status = self._parse_status(data, now)
+        if status is None:
+            self._handle_unknown(data, addr, tag)
+            return
+        self.status_count = next(self._status_seq)
+        self.last_status_time = now
+        self.latest_status = status
+        self._status_ring[self._status_head & _STATUS_RING_MASK] = status
+        self._status_head += 1
+        self._status_event.set()
+        if not self.quiet:
+            self._log_q.put_nowait(
+                (_STATUS_FMT, (status.mode_str, status.left_us, status.right_us)))
+
+    def _handle_flow(self, data: memoryview, addr, tag: str):
+        """Handle flow data message: F <freq_hz> <flow_lmin> <velocity_ms> <total_liters>"""
+        flow = self._parse_flow(data, self.last_receive_time)
+        if flow is None:
+            self._handle_unknown(data, addr, tag)
+            return
+        self.flow_count = next(self._flow_seq)
+        self.latest_flow = flow
+        if not self.quiet:
+            self._log_q.put_nowait((_FLOW_FMT, (flow.freq_hz, flow.flow_lmin,
+                                                flow.velocity_ms, flow.total_liters)))
+
+    def _handle_unknown(self, data: memoryview, addr, tag: str):
+        """Handle any message without a registered handler"""
+        if self.quiet:
+            return
+        # Protocol is ASCII with a trailing newline only: ASCII fast path, one-sided strip
+        message = str(data, 'ascii', 'ignore').rstrip()
+        self._log_q.put_nowait((_UNKNOWN_FMT, (message, addr[0], addr[1])))
 
     def _receive_loop(self):
         """Background thread for receiving UDP messages from data and heartbeat ports"""
-        import select
+        self._tune_receive_thread()
+
+        # Bind hot-path lookups to locals once; the loop body then only
+        # touches self to publish last_receive_time
+        now = _now
+        lookup = self._dispatch.get
+        handle_unknown = self._handle_unknown
+        record_heartbeat = self._record_heartbeat
+        select = self._selector.select
+        rxbuf = self._rxbuf
+        rxmv = self._rxmv
 
         while self.running:
             try:
-                # Use select to wait for data on any socket
-                sockets = [s for s in (self.data_sock, self.heartbeat_sock) if s]
-                readable, _, _ = select.select(sockets, [], [], 0.1)
-
-                for sock in readable:
-                    data, addr = sock.recvfrom(256)
-                    self.last_receive_time = time.time()
-                    message = data.decode('utf-8', errors='ignore').strip()
-
-                    # Determine which socket received the data
-                    is_heartbeat = (sock == self.heartbeat_sock)
-
-                    # Handle different message types
-                    if message == "HEARTBEAT":
-                        self.heartbeat_count += 1
-                        self.last_heartbeat_time = time.time()
-                        port_str = f":{addr[1]}" if is_heartbeat else ""
-                        print(f"[HEARTBEAT] #{self.heartbeat_count} from {addr[0]}{port_str}")
-
-                    elif message.startswith('S '):
-                        status = self._parse_status(message)
-                        if status:
-                            self.status_count += 1
-                            self.last_status_time = time.time()
-                            self.latest_status = status
-                            print(f"[STATUS] Mode={status.mode_str} L={status.left_us} R={status.right_us}us")
-
-                    elif message.startswith('F '):
-                        flow = self._parse_flow(message)
-                        if flow:
-                            self.flow_count += 1
-                            self.latest_flow = flow
-                            print(f"[FLOW] {flow.freq_hz:.2f}Hz, {flow.flow_lmin:.2f}L/min, "
-                                  f"{flow.velocity_ms:.4f}m/s, Total={flow.total_liters:.3f}L")
-
-                    else:
-                        print(f"[UNKNOWN] {message} from {addr[0]}:{addr[1]}")
-
-            except socket.timeout:
+                # Block until a datagram arrives (no idle polling);
+                # disconnect() writes to the wake socket to end the wait
+                for key, _ in select():
+                    tag = key.data
+                    if tag == 'wake':
+                        continue
+                    sock = key.fileobj
+
+                    nbytes, addr = sock.recvfrom_into(rxbuf, _RX_BUFSIZE)
+                    if not nbytes:
+                        continue
+                    # One clock read per packet; handlers reuse last_receive_time
+                    self.last_receive_time = now()
+
+                    # Fast path for the most frequent packet on the heartbeat
+                    # port: exact byte match, no dispatch or parsing
+                    if tag == 'heartbeat' and rxmv[:nbytes] in _HEARTBEAT_MSGS:
+                        record_heartbeat(addr, tag)
+                        continue
+
+                    # Single table lookup on the first byte; handlers get a
+                    # zero-copy view that is only valid until the next receive
+                    lookup(rxbuf[0], handle_unknown)(rxmv[:nbytes], addr, tag)
+
+            except (BlockingIOError, ConnectionRefusedError):
+                # Spurious readiness leaves nothing to read; connected UDP
+                # sockets report ICMP port-unreachable here
                 continue
             except (socket.error, ValueError) as e:
                 if self.running:
                     print(f"[ERROR] Receive error: {e}")
                 break
 
+    def drain_statuses(self) -> list:
+        """Return every status received since the previous drain, oldest first
+
+        If the consumer falls more than _STATUS_RING_SIZE entries behind, the
+        oldest overwritten entries are skipped.
+        """
+        head = self._status_head
+        tail = max(self._status_tail, head - _STATUS_RING_SIZE)
+        ring = self._status_ring
+        statuses = [ring[i & _STATUS_RING_MASK] for i in range(tail, head)]
+        self._status_tail = head
+        return statuses
+
     def start_receiving(self):
         """Start background receive thread"""
         if not self.data_sock or not self.heartbeat_sock:
             print("[ERROR] Sockets not connected")
             return
 
+        # Register the sockets once, each tagged with its role; epoll/kqueue
+        # keep the interest set in the kernel
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.data_sock, selectors.EVENT_READ, 'data')
+        self._selector.register(self.heartbeat_sock, selectors.EVENT_READ, 'heartbeat')
+        self._selector.register(self._wake_r, selectors.EVENT_READ, 'wake')
+
         self.running = True
+        self._stop.clear()
+        self.log_thread = threading.Thread(target=self._log_loop, daemon=True)
+        self.log_thread.start()
         self.receive_thread = threading.Thread(target=self._receive_loop, daemon=True)
         self.receive_thread.start()
         print("[INFO] Receive thread started (listening on data + heartbeat ports)")
 
+    def _log_loop(self):
+        """Background thread printing messages queued by the receive thread"""
+        for fmt, args in iter(self._log_q.get, None):
+            print(fmt(*args))
+
+    def _tune_receive_thread(self):
+        """Best-effort real-time priority and CPU pinning for the receive thread (Linux)
+
+        Called from the receive thread itself (pid 0 = calling thread), so the
+        settings apply before its first receive.
+        """
+        if self.rx_cpu is not None and hasattr(os, 'sched_setaffinity'):
+            try:
+                os.sched_setaffinity(0, {self.rx_cpu})
+                print(f"[INFO] Receive thread pinned to CPU {self.rx_cpu}")
+            except OSError as e:
+                print(f"[WARN] Could not pin receive thread to CPU {self.rx_cpu}: {e}")
+
+        if hasattr(os, 'sched_setscheduler'):
+            try:
+                os.sched_setscheduler(0, os.SCHED_RR, os.sched_param(20))
+            except OSError:
+                pass  # Needs CAP_SYS_NICE; keep default scheduling
+
     def _keep_alive_loop(self, interval: float = 1.0):
         """Background thread for sending keep-alive PING messages
 
+        A PING is only sent when nothing else has been sent for `interval`
+        seconds, since commands also reset the Arduino timeout. The wait ends
+        immediately when disconnect() sets the stop event. Each period gets
+        ±15% jitter so PINGs do not phase-lock with the Arduino's periodic
+        status/heartbeat sends or with other clients.
+
         Args:
-            interval: Seconds between keep-alive pings (default: 1.0)
+            interval: Nominal seconds without traffic before a PING (default: 1.0)
         """
-        while self.running:
-            time.sleep(interval)
-            if self.running:
+        stop = self._stop
+        period = interval * random.uniform(0.85, 1.15)
+        while not stop.wait(max(0.0, period - (_now() - self._last_send_t))):
+            if _now() - self._last_send_t >= period:
                 self.send_ping()
+            period = interval * random.uniform(0.85, 1.15)
 
     def start_keep_alive(self, interval: float = 1.0):
         """Start background keep-alive thread
@@ -282,6 +658,7 @@ class UDPTestClient:
             print("[ERROR] Heartbeat socket not connected")
             return
 
+        self._stop.clear()
         self.keep_alive_thread = threading.Thread(
             target=self._keep_alive_loop,
             args=(interval,),
@@ -292,24 +669,52 @@ class UDPTestClient:
 
     def is_arduino_online(self) -> bool:
         """Check if Arduino is online based on heartbeat timeout"""
-        if self.last_heartbeat_time == 0.0:
+        if self.last_heartbeat_time_ns == 0:
             return False
-        return (time.time() - self.last_heartbeat_time) < self.heartbeat_timeout
+        return (time.monotonic_ns() - self.last_heartbeat_time_ns) < self.heartbeat_timeout_ns
+
+    def get_heartbeat_timestamps(self, start_index: int = 0,
+                                 end_index: Optional[int] = None) -> list:
+        """Get HEARTBEAT arrival times (monotonic ns) for [start_index, end_index)
+
+        Only the most recent _HB_RING_SIZE arrivals are retained. end_index
+        defaults to the current write index.
+        """
+        latest = self._hb_idx
+        end = latest if end_index is None else min(end_index, latest)
+        start = max(start_index, latest - _HB_RING_SIZE, 0)
+        ring = self._hb_timestamps
+        return [ring[i & _HB_RING_MASK] for i in range(start, end)]
 
     def get_time_since_last_heartbeat(self) -> float:
         """Get time in seconds since last heartbeat"""
-        if self.last_heartbeat_time == 0.0:
+        if self.last_heartbeat_time_ns == 0:
             return float('inf')
-        return time.time() - self.last_heartbeat_time
+        return (time.monotonic_ns() - self.last_heartbeat_time_ns) / 1e9
+
+    def snapshot(self) -> tuple:
+        """Read heartbeat state consistently in one lock acquisition
+
+        Returns:
+            (online, seconds since last heartbeat, heartbeat count)
+        """
+        with self._hb_cv:
+            last_ns = self.last_heartbeat_time_ns
+            count = self.heartbeat_count
+        if last_ns == 0:
+            return False, float('inf'), count
+        since_ns = time.monotonic_ns() - last_ns
+        return since_ns < self.heartbeat_timeout_ns, since_ns / 1e9, count
 
     def print_statistics(self):
         """Print communication statistics"""
-        uptime = time.time() - self.last_receive_time if self.last_receive_time > 0 else 0
+        uptime = _now() - self.last_receive_time if self.last_receive_time > 0 else 0
 
         print("\n=== Communication Statistics ===")
         print(f"  Heartbeats received: {self.heartbeat_count}")
         print(f"  Status messages: {self.status_count}")
         print(f"  Flow data messages: {self.flow_count}")
+        print(f"  Commands transmitted: {self.commands_sent}")
         print(f"  Time since last heartbeat: {self.get_time_since_last_heartbeat():.2f}s")
         print(f"  Arduino online: {self.is_arduino_online()}")
 
@@ -327,6 +732,21 @@ class UDPTestClient:
             print(f"    Total Volume: {self.latest_flow.total_liters} L")
 
 
+# Fixed interactive commands: alias -> (left_us, right_us, name)
+_SIMPLE_CMDS = {
+    'n': (1500, 1500, "Neutral"),
+    'neutral': (1500, 1500, "Neutral"),
+    'f': (1600, 1600, "Forward"),
+    'forward': (1600, 1600, "Forward"),
+    'b': (1400, 1400, "Backward"),
+    'backward': (1400, 1400, "Backward"),
+    'l': (1500, 1600, "Left"),
+    'left': (1500, 1600, "Left"),
+    'r': (1600, 1500, "Right"),
+    'right': (1600, 1500, "Right"),
+}
+
+
 def interactive_mode(client: UDPTestClient):
     """Interactive command mode"""
     print("\n=== Interactive Command Mode ===")
@@ -353,25 +773,11 @@ def interactive_mode(client: UDPTestClient):
             if cmd in ('q', 'quit'):
                 break
 
-            elif cmd in ('n', 'neutral'):
-                client.send_command(1500, 1500)
-                print("[SENT] Neutral (1500, 1500)")
-
-            elif cmd in ('f', 'forward'):
-                client.send_command(1600, 1600)
-                print("[SENT] Forward (1600, 1600)")
-
-            elif cmd in ('b', 'backward'):
-                client.send_command(1400, 1400)
-                print("[SENT] Backward (1400, 1400)")
-
-            elif cmd in ('l', 'left'):
-                client.send_command(1500, 1600)
-                print("[SENT] Left (1500, 1600)")
-
-            elif cmd in ('r', 'right'):
-                client.send_command(1600, 1500)
-                print("[SENT] Right (1600, 1500)")
+            preset = _SIMPLE_CMDS.get(cmd)
+            if preset:
+                l, r, name = preset
+                client.send_command(l, r, force=True)
+                print(f"[SENT] {name} ({l}, {r})")
 
             elif cmd == 'ping':
                 client.send_ping()
@@ -402,7 +808,7 @@ def interactive_mode(client: UDPTestClient):
                     try:
                         l, r = int(parts[0]), int(parts[1])
                         if 1100 <= l <= 1900 and 1100 <= r <= 1900:
-                            client.send_command(l, r)
+                            client.send_command(l, r, force=True)
                             print(f"[SENT] Custom ({l}, {r})")
                         else:
                             print("[ERROR] Values must be between 1100 and 1900")
@@ -417,53 +823,105 @@ def interactive_mode(client: UDPTestClient):
 
 
 def heartbeat_test_mode(client: UDPTestClient, duration: int = 10):
-    """Test heartbeat reception for a specified duration"""
+    """Test heartbeat reception for a specified duration
+
+    Arrival times are captured by the receive thread, so intervals are
+    measured at full resolution instead of on a 100ms poll. The test thread
+    sleeps on the heartbeat condition and folds each new interval into
+    running statistics as it arrives, so gaps are reported as soon as the
+    late heartbeat lands and long runs are not limited by the ring size.
+    """
     print(f"\n=== Heartbeat Test Mode ({duration}s) ===")
     print("Monitoring heartbeat messages from Arduino...")
     print(f"Expected: ~{duration * 2} heartbeats (every 500ms)")
 
-    start_time = time.time()
+    start_time = _now()
+    start_index = client._hb_idx
     expected_interval = 0.5  # Arduino sends every 500ms
-    last_heartbeat_interval = 0.0
+    # Interval math stays in integer monotonic nanoseconds
+    expected_interval_ns = 500_000_000
+    jitter_ns = 200_000_000
+
+    hb_cv = client._hb_cv
+    seen_index = start_index
+    end_time = start_time + duration
+    next_report = start_time + 1.0
+
+    # Running interval statistics (ns)
+    interval_count = 0
+    interval_sum = 0
+    min_interval = max_interval = 0
     missed_heartbeats = 0
-    previous_heartbeat_time = 0.0
 
-    while time.time() - start_time < duration:
-        time.sleep(0.1)
+    while True:
+        now = _now()
+        done = now >= end_time
+        if done:
+            # Final pass picks up heartbeats since the last wakeup
+            index = client._hb_idx
+        else:
+            # Block until a heartbeat arrives or the next once-per-second report is due;
+            # the predicate also catches heartbeats notified while we were printing
+            with hb_cv:
+                hb_cv.wait_for(lambda: client._hb_idx != seen_index,
+                               timeout=min(next_report, end_time) - now)
+                index = client._hb_idx
+            now = _now()
+        elapsed = now - start_time
 
-        # Check heartbeat intervals
-        if client.last_heartbeat_time > previous_heartbeat_time:
-            if previous_heartbeat_time > 0:
-                interval = client.last_heartbeat_time - previous_heartbeat_time
-                last_heartbeat_interval = interval
+        # Fold new intervals into the stats and flag a gap the moment the
+        # late heartbeat lands
+        if index != seen_index:
+            new = client.get_heartbeat_timestamps(max(start_index, seen_index - 1), index)
+            for a, b in zip(new, new[1:]):
+                interval = b - a
+                if interval_count == 0 or interval < min_interval:
+                    min_interval = interval
+                if interval > max_interval:
+                    max_interval = interval
+                interval_count += 1
+                interval_sum += interval
                 # Allow some jitter (±100ms)
-                if interval > expected_interval + 0.2:
-                    missed_heartbeats += int(interval / expected_interval) - 1
-            previous_heartbeat_time = client.last_heartbeat_time
+                if interval > expected_interval_ns + jitter_ns:
+                    missed_heartbeats += interval // expected_interval_ns - 1
+                    print(f"[{elapsed:.1f}s] Heartbeat gap: {interval / 1e9:.2f}s")
+            seen_index = index
+        if done:
+            break
 
-        # Print status every second
-        elapsed = time.time() - start_time
-        if int(elapsed) > int(elapsed - 0.1):
+        # Print status every second; advance by whole seconds so a late
+        # wakeup neither repeats nor drifts the report schedule
+        if now >= next_report:
+            while next_report <= now:
+                next_report += 1.0
             online = client.is_arduino_online()
+            recent = client.get_heartbeat_timestamps(client._hb_idx - 2)
+            last_interval_ns = recent[1] - recent[0] if len(recent) == 2 else 0
             print(f"[{elapsed:.0f}s] Heartbeats: {client.heartbeat_count}, "
                   f"Online: {online}, "
-                  f"Last interval: {last_heartbeat_interval:.2f}s")
+                  f"Last interval: {last_interval_ns / 1e9:.2f}s")
 
     # Summary
-    actual_duration = time.time() - start_time
+    actual_duration = _now() - start_time
+    received = seen_index - start_index
     expected_count = int(actual_duration / expected_interval)
-    received_percent = (client.heartbeat_count / expected_count * 100) if expected_count > 0 else 0
+    received_percent = (received / expected_count * 100) if expected_count > 0 else 0
 
     print("\n=== Heartbeat Test Results ===")
     print(f"  Duration: {actual_duration:.2f}s")
     print(f"  Expected heartbeats: ~{expected_count}")
-    print(f"  Received heartbeats: {client.heartbeat_count}")
+    print(f"  Received heartbeats: {received}")
     print(f"  Success rate: {received_percent:.1f}%")
     print(f"  Missed heartbeats: {missed_heartbeats}")
 
-    if client.heartbeat_count > 0:
-        avg_interval = actual_duration / client.heartbeat_count
+    if interval_count:
+        avg_interval = interval_sum / interval_count / 1e9
         print(f"  Average interval: {avg_interval:.3f}s (expected: {expected_interval}s)")
+        print(f"  Min/Max interval: {min_interval / 1e9:.3f}s / {max_interval / 1e9:.3f}s")
+
+    if received > _HB_RING_SIZE:
+        print(f"  Note: arrival-time ring wrapped; get_heartbeat_timestamps() only "
+              f"holds the last {_HB_RING_SIZE} (stats above cover the whole run)")
 
 
 def thruster_test_mode(client: UDPTestClient):
@@ -498,19 +956,16 @@ def thruster_test_mode(client: UDPTestClient):
 
         # Clear latest status to verify new response
         client.latest_status = StatusData()
+        client._status_event.clear()
 
         # Send command
-        if not client.send_command(left, right):
+        if not client.send_command(left, right, force=True):
             print(f"  [FAIL] Could not send command")
             failed += 1
             continue
 
-        # Wait for status response (with timeout)
-        deadline = time.time() + 1.0
-        while time.time() < deadline:
-            time.sleep(0.05)
-            if client.latest_status.timestamp > 0:
-                break
+        # Wait for status response (with timeout); wakes as soon as it arrives
+        client._status_event.wait(timeout=1.0)
 
         # Verify response
         if client.latest_status.timestamp == 0:
@@ -535,16 +990,14 @@ def thruster_test_mode(client: UDPTestClient):
 
     # Test rate limiting
     print("\n=== Rate Limiting Test ===")
-    print("Sending 5 commands rapidly (should be rate limited to 100ms min)...")
-    start = time.time()
-    for i in range(5):
-        client.send_command(1600, 1600)
-        time.sleep(0.02)  # 20ms between commands
-    elapsed = time.time() - start
-    print(f"  Sent 5 commands in {elapsed:.3f}s (20ms intervals)")
-    print(f"  Expected minimum time: {4 * 0.100:.1f}s (100ms rate limit)")
-    if elapsed >= 0.4:
-        print(f"  [INFO] Commands appear to be rate limited correctly")
+    print("Sending 5 commands in one burst (should be rate limited to 100ms min)...")
+    burst = [(1600, 1600)] * 5
+    start = _now()
+    sent = client.send_command_burst(burst)
+    elapsed = _now() - start
+    method = "1 sendmmsg call" if _sendmmsg else f"{len(burst)} send calls"
+    print(f"  Sent {sent} commands in {elapsed * 1e6:.0f}µs ({method})")
+    print(f"  Expected: Arduino applies at most one command per 100ms")
 
     # Summary
     print(f"\n=== Test Summary ===")
@@ -580,37 +1033,52 @@ def hz_10_test_mode(client: UDPTestClient, duration: int = 30):
     ]
     cmd_index = 0
 
-    start_time = time.time()
+    status_event = client._status_event
+    start_time = _now()
     sent_count = 0
-    response_times = []
-    last_command_time = 0
+    # Typed buffer: latencies are stored as raw doubles, not float objects
+    response_times = array.array('d')
+    # Sends are scheduled on the fixed grid start + 0.1*slot so the rate
+    # does not drift by the per-iteration overhead
+    send_interval = 0.1
+    slot = 0
+    next_send = start_time
     last_expected_left = 1500
     last_expected_right = 1500
 
+    # In quiet mode rows are buffered and printed after the run so console
+    # I/O does not interleave with the latency measurements
+    rows = [] if client.quiet else None
+    emit = rows.append if rows is not None else print
+
     print(f"\n{'Time':<8} {'Sent':<20} {'Status':<20} {'Latency':<10} {'Delta':<10}")
     print("-" * 75)
 
-    while time.time() - start_time < duration:
-        now = time.time()
+    end_time = start_time + duration
+    while True:
+        now = _now()
+        if now >= end_time:
+            break
         elapsed = now - start_time
 
         # Send command at 10Hz (every 100ms)
-        if elapsed - last_command_time >= 0.1:
+        if now >= next_send:
             left, right, desc = commands[cmd_index % len(commands)]
+            status_event.clear()
             client.send_command(left, right)
-            sent_time = time.time()
+            sent_time = _now()
             sent_count += 1
             last_expected_left = left
             last_expected_right = right
-            last_command_time = elapsed
 
             # Wait for status response
             deadline = sent_time + 0.2  # 200ms timeout
             response_received = False
             latency = 0
 
-            while time.time() < deadline:
-                time.sleep(0.005)  # 5ms poll
+            # Woken by the receive thread on each status, not by a poll tick
+            while status_event.wait(timeout=max(0.0, deadline - _now())):
+                status_event.clear()
                 if client.latest_status.timestamp > sent_time:
                     latency = (client.latest_status.timestamp - sent_time) * 1000  # ms
                     response_times.append(latency)
@@ -623,14 +1091,22 @@ def hz_10_test_mode(client: UDPTestClient, duration: int = 30):
                 match = (s.left_us == left and s.right_us == right)
                 match_str = "✓" if match else "✗"
                 delta = abs(s.left_us - left) + abs(s.right_us - right)
-                print(f"{elapsed:>6.1f}s  {desc:<20}  L={s.left_us} R={s.right_us:<4}  "
-                      f"{latency:>6.0f}ms  {delta:>4}µs {match_str}")
+                emit(f"{elapsed:>6.1f}s  {desc:<20}  L={s.left_us} R={s.right_us:<4}  "
+                     f"{latency:>6.0f}ms  {delta:>4}µs {match_str}")
             else:
-                print(f"{elapsed:>6.1f}s  {desc:<20}  (no response)     ---        ---")
+                emit(f"{elapsed:>6.1f}s  {desc:<20}  (no response)     ---        ---")
 
             cmd_index += 1
+            # Next grid slot; slots overrun by a slow response are skipped
+            # rather than sent back-to-back past the Arduino's rate limit
+            slot = max(slot + 1, int((_now() - start_time) / send_interval) + 1)
+            next_send = start_time + send_interval * slot
 
-        time.sleep(0.01)  # 10ms sleep between checks
+        # Sleep straight to the next send deadline instead of polling
+        time.sleep(max(0.0, min(next_send, end_time) - _now()))
+
+    if rows:
+        print("\n".join(rows))
 
     # Summary statistics
     print("\n=== 10Hz Test Results ===")
@@ -640,13 +1116,18 @@ def hz_10_test_mode(client: UDPTestClient, duration: int = 30):
     print(f"  Actual rate: {sent_count / duration:.2f} Hz")
 
     if response_times:
+        # Sort once; min/max/median are then index lookups
+        ordered = sorted(response_times)
+        n = len(ordered)
+        mid = n // 2
+        median = ordered[mid] if n % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+        mean = statistics.fmean(ordered)
         print(f"\n  Latency Statistics:")
-        print(f"    Min: {min(response_times):.1f} ms")
-        print(f"    Max: {max(response_times):.1f} ms")
-        print(f"    Avg: {statistics.mean(response_times):.1f} ms")
-        print(f"    Median: {statistics.median(response_times):.1f} ms")
-        if len(response_times) > 1:
-            print(f"    Std Dev: {statistics.stdev(response_times):.1f} ms")
+        print(f"    Min: {ordered[0]:.1f} ms")
+        print(f"    Max: {ordered[-1]:.1f} ms")
+        print(f"    Avg: {mean:.1f} ms")
+        print(f"    Median: {median:.1f} ms")
+        print(f"    Std Dev: {statistics.pstdev(ordered, mean):.1f} ms")
 
     # Final status
     if client.latest_status.timestamp > 0:
@@ -683,10 +1164,10 @@ def steady_test_mode(client: UDPTestClient, hold_duration: int = 5):
     print(f"\n{'Time':<8} {'Command':<16} {'Description':<16} {'Status':<20} {'Delta':<10}")
     print("-" * 85)
 
-    start_time = time.time()
+    start_time = _now()
 
     for left, right, name, desc in commands:
-        cmd_start = time.time()
+        cmd_start = _now()
         elapsed_total = cmd_start - start_time
 
         # Send command
@@ -696,24 +1177,29 @@ def steady_test_mode(client: UDPTestClient, hold_duration: int = 5):
         # Wait for thruster to respond and stabilize
         time.sleep(0.2)  # Initial response delay
 
-        # Monitor status during hold period
-        status_samples = []
-        monitor_start = time.time()
+        # Monitor status during hold period (every status, not just the latest);
+        # stability stats are accumulated as statuses arrive
+        sample_count = 0
+        delta_sum = 0
+        max_delta = 0
+        final_left = final_right = final_delta = 0
+        monitor_start = _now()
+        client.drain_statuses()  # Discard statuses from the settling delay
 
-        while time.time() - monitor_start < hold_duration:
-            if client.latest_status.timestamp > cmd_start:
-                s = client.latest_status
-                delta = abs(s.left_us - left) + abs(s.right_us - right)
-                status_samples.append((time.time(), s.left_us, s.right_us, delta))
+        while _now() - monitor_start < hold_duration:
             time.sleep(0.1)
+            for s in client.drain_statuses():
+                final_left, final_right = s.left_us, s.right_us
+                final_delta = abs(final_left - left) + abs(final_right - right)
+                sample_count += 1
+                delta_sum += final_delta
+                if final_delta > max_delta:
+                    max_delta = final_delta
 
         # Show final status after hold period
-        if status_samples:
-            _, final_left, final_right, final_delta = status_samples[-1]
+        if sample_count:
             # Calculate stability (how much it varied during hold)
-            deltas = [s[3] for s in status_samples]
-            avg_delta = sum(deltas) / len(deltas)
-            max_delta = max(deltas)
+            avg_delta = delta_sum / sample_count
 
             print(f"L={final_left} R={final_right:<4}  ", end="")
             if final_delta < 10:
@@ -724,7 +1210,7 @@ def steady_test_mode(client: UDPTestClient, hold_duration: int = 5):
                 print(f"Off target   {final_delta:>4}µs", end="")
 
             # Show stability info
-            if len(status_samples) > 1:
+            if sample_count > 1:
                 print(f"  (avg: {avg_delta:.0f}µs, max: {max_delta}µs)")
             else:
                 print()
@@ -732,7 +1218,7 @@ def steady_test_mode(client: UDPTestClient, hold_duration: int = 5):
             print("(no response)")
 
     # Final summary
-    total_time = time.time() - start_time
+    total_time = _now() - start_time
     print(f"\n=== Steady Test Complete ===")
     print(f"  Total duration: {total_time:.1f}s")
     print(f"  Commands tested: {len(commands)}")
@@ -744,6 +1230,18 @@ def steady_test_mode(client: UDPTestClient, hold_duration: int = 5):
         print(f"\n  Final Status: Mode={s.mode_str} L={s.left_us} R={s.right_us}us")
 
 
+@functools.lru_cache(maxsize=256)
+def _classify(left: int, right: int) -> str:
+    """Describe a (left, right) command for test output"""
+    if left == 1500 and right == 1500:
+        return "Neutral (Stop)"
+    if left > 1500 and right > 1500:
+        return f"Forward ({left}µs)"
+    if left < 1500 and right < 1500:
+        return f"Backward ({left}µs)"
+    return f"Custom (L={left}, R={right})"
+
+
 def hold_test_mode(client: UDPTestClient, left: int, right: int, duration: int = 20):
     """Hold a single command for specified duration
 
@@ -756,69 +1254,92 @@ def hold_test_mode(client: UDPTestClient, left: int, right: int, duration: int =
         right: Right ESC pulse width (1100-1900µs)
         duration: Hold duration in seconds
     """
-    # Determine command description
-    if left == 1500 and right == 1500:
-        desc = "Neutral (Stop)"
-    elif left > 1500 and right > 1500:
-        desc = f"Forward ({left}µs)"
-    elif left < 1500 and right < 1500:
-        desc = f"Backward ({left}µs)"
-    else:
-        desc = f"Custom (L={left}, R={right})"
+    desc = _classify(left, right)
 
     print(f"\n=== Hold Test: {desc} ===")
     print(f"Holding C {left} {right} for {duration}s...")
-    print("Command sent repeatedly at 10Hz (every 100ms) to maintain target.")
+    print("Command re-issued at 10Hz (every 100ms) to maintain target;")
+    print(f"unchanged repeats are transmitted at least every {_HOLD_FORCE_EVERY * 0.1:.1f}s.")
     print("Monitoring thruster response during hold period.\n")
 
-    cmd_time = time.time()
-    last_send_time = 0
+    cmd_time = _now()
+    end_time = cmd_time + duration
     send_interval = 0.1  # Send command at 10Hz (every 100ms)
-    commands_sent = 0
+    next_send = cmd_time  # Absolute send deadline on a fixed 100ms grid
+    commands_issued = 0
+    tx_start = client.commands_sent
 
     # Monitor status during hold period
     print(f"\n{'Time':<8} {'Status':<25} {'Delta':<10} {'Mode':<8}")
     print("-" * 60)
 
-    samples = []
-    while time.time() - cmd_time < duration:
-        # Send command repeatedly
-        now = time.time()
-        if now - last_send_time >= send_interval:
-            client.send_command(left, right)
-            last_send_time = now
-            commands_sent += 1
-
-        time.sleep(0.05)  # 50ms sleep
-        if client.latest_status.timestamp > cmd_time:
-            s = client.latest_status
-            delta = abs(s.left_us - left) + abs(s.right_us - right)
-            elapsed = now - cmd_time
-            samples.append((elapsed, s.left_us, s.right_us, delta, s.mode_str))
+    # Running delta statistics; nothing is kept per sample
+    sample_count = 0
+    delta_sum = 0
+    min_delta = max_delta = 0
+    final_left = final_right = 0
+    status_event = client._status_event
+    status_event.clear()
+    last_status_t = cmd_time
+    last_printed_second = -1
+    row_fmt = "{:>6.1f}s  L={} R={:<4}  {:>4}µs    {}".format
+    while True:
+        now = _now()
+        if now >= end_time:
+            break
 
-            # Print status every second
-            if len(samples) == 1 or int(elapsed) > int(samples[-2][0]) if len(samples) > 1 else False:
-                mode_display = "WiFi" if s.mode_str == "WiFi" else "RC"
-                print(f"{elapsed:>6.1f}s  L={s.left_us} R={s.right_us:<4}  {delta:>4}µs    {mode_display}")
+        # Send command repeatedly; advance the deadline by whole periods so
+        # a late wakeup neither drifts the cadence nor sends a catch-up burst
+        if now >= next_send:
+            # Repeats in between are coalesced by send_command
+            client.send_command(left, right, force=commands_issued % _HOLD_FORCE_EVERY == 0)
+            commands_issued += 1
+            next_send += send_interval
+            if next_send <= now:
+                next_send = now + send_interval
+
+        # Sleep until the next send is due, waking early when a status arrives
+        if not status_event.wait(timeout=max(0.0, min(next_send, end_time) - _now())):
+            continue
+        status_event.clear()
+        # Sample only statuses not seen before
+        s = client.latest_status
+        ts = s.timestamp
+        if ts > last_status_t:
+            last_status_t = ts
+            s_left, s_right, mode = s.left_us, s.right_us, s.mode_str
+            delta = abs(s_left - left) + abs(s_right - right)
+            elapsed = ts - cmd_time
+            if sample_count == 0 or delta < min_delta:
+                min_delta = delta
+            if delta > max_delta:
+                max_delta = delta
+            sample_count += 1
+            delta_sum += delta
+            final_left, final_right = s_left, s_right
+
+            # Print the first sample of each second
+            elapsed_int = int(elapsed)
+            if elapsed_int != last_printed_second:
+                last_printed_second = elapsed_int
+                print(row_fmt(elapsed, s_left, s_right, delta, mode))
 
     # Summary statistics
-    if samples:
-        deltas = [s[3] for s in samples]
-        avg_delta = sum(deltas) / len(deltas)
-        min_delta = min(deltas)
-        max_delta = max(deltas)
+    if sample_count:
+        avg_delta = delta_sum / sample_count
 
         print(f"\n=== Hold Test Results ===")
         print(f"  Command: C {left} {right}")
         print(f"  Duration: {duration}s")
-        print(f"  Commands sent: {commands_sent} (every {send_interval}s)")
-        print(f"  Samples collected: {len(samples)}")
+        print(f"  Commands issued: {commands_issued} (every {send_interval}s)")
+        print(f"  Commands transmitted: {client.commands_sent - tx_start} "
+              f"(at least every {_HOLD_FORCE_EVERY * send_interval:.1f}s)")
+        print(f"  Samples collected: {sample_count}")
         print(f"\n  Delta from target:")
         print(f"    Average: {avg_delta:.1f}µs")
         print(f"    Min: {min_delta}µs")
         print(f"    Max: {max_delta}µs")
 
-        final_left, final_right = samples[-1][1], samples[-1][2]
         print(f"\n  Final output: L={final_left} R={final_right}µs")
 
         # Check if stable
@@ -830,7 +1351,14 @@ def hold_test_mode(client: UDPTestClient, left: int, right: int, duration: int =
             print(f"  ✗ Unstable: Average delta {avg_delta:.1f}µs from target")
 
 
-def main():
+def _build_parser():
+    """Build the command-line parser
+
+    argparse is imported here so importing this module for UDPTestClient
+    alone does not pay for it.
+    """
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Test UDP communication with Arduino thruster controller"
     )
@@ -887,16 +1415,38 @@ def main():
         action='store_true',
         help='Disable automatic handshake (you must send PING to 8889 manually)'
     )
+    parser.add_argument(
+        '--quiet',
+        action='store_true',
+        help='Do not print every received HEARTBEAT/status/flow message'
+    )
+    parser.add_argument(
+        '--rx-cpu',
+        type=int,
+        metavar='CPU',
+        help='Pin the receive thread to this CPU (Linux only)'
+    )
+    parser.add_argument(
+        '--rcvbuf',
+        type=int,
+        default=_RCVBUF_BYTES,
+        metavar='BYTES',
+        help=f'Requested socket receive buffer size (default: {_RCVBUF_BYTES})'
+    )
     parser.add_argument(
         '--keep-alive',
         action='store_true',
         help='Enable keep-alive (send PING every 1s to maintain connection)'
     )
+    return parser
 
-    args = parser.parse_args()
+
+def main():
+    args = _build_parser().parse_args()
 
     # Create client
-    client = UDPTestClient(args.ip, args.data_port, args.heartbeat_port)
+    client = UDPTestClient(args.ip, args.data_port, args.heartbeat_port,
+                           rx_cpu=args.rx_cpu, quiet=args.quiet, rcvbuf=args.rcvbuf)
 
     # Connect
     if not client.connect():
@@ -911,7 +1461,7 @@ def main():
         print("\n[HANDSHAKE] Sending PING to mark Jetson online...")
         if args.initial_command:
             left, right = args.initial_command
-            client.send_command(left, right)
+            client.send_command(left, right, force=True)
             print(f"[CMD] Sent custom command: C {left} {right}")
         client.send_handshake()
         print("[HANDSHAKE] Sent PING")
@@ -925,7 +1475,7 @@ def main():
     elif args.initial_command:
         left, right = args.initial_command
         print(f"\n[CMD] Sending initial command: C {left} {right}")
-        client.send_command(left, right)
+        client.send_command(left, right, force=True)
 
     # Start keep-alive if requested
     if args.keep_alive:
@@ -936,10 +1486,7 @@ def main():
         if args.mode == 'interactive':
             # Wait for first heartbeat
             print("\n[WAIT] Waiting for first heartbeat...")
-            for _ in range(50):  # Wait up to 5 seconds
-                if client.is_arduino_online():
-                    break
-                time.sleep(0.1)
+            client._online_event.wait(timeout=5.0)  # Wait up to 5 seconds
 
             if client.is_arduino_online():
                 print("[OK] Arduino is online! Starting interactive mode...\n")
@@ -954,10 +1501,7 @@ def main():
         elif args.mode == 'thruster':
             # Wait for first heartbeat
             print("\n[WAIT] Waiting for first heartbeat...")
-            for _ in range(50):  # Wait up to 5 seconds
-                if client.is_arduino_online():
-                    break
-                time.sleep(0.1)
+            client._online_event.wait(timeout=5.0)  # Wait up to 5 seconds
 
             if client.is_arduino_online():
                 print("[OK] Arduino is online! Starting thruster test...\n")
@@ -969,10 +1513,7 @@ def main():
         elif args.mode == 'hz10':
             # Wait for first heartbeat
             print("\n[WAIT] Waiting for first heartbeat...")
-            for _ in range(50):  # Wait up to 5 seconds
-                if client.is_arduino_online():
-                    break
-                time.sleep(0.1)
+            client._online_event.wait(timeout=5.0)  # Wait up to 5 seconds
 
             if client.is_arduino_online():
                 print("[OK] Arduino is online! Starting 10Hz latency test...\n")
@@ -984,10 +1525,7 @@ def main():
         elif args.mode == 'steady':
             # Wait for first heartbeat
             print("\n[WAIT] Waiting for first heartbeat...")
-            for _ in range(50):  # Wait up to 5 seconds
-                if client.is_arduino_online():
-                    break
-                time.sleep(0.1)
+            client._online_event.wait(timeout=5.0)  # Wait up to 5 seconds
 
             if client.is_arduino_online():
                 print("[OK] Arduino is online! Starting steady speed test...\n")
@@ -999,10 +1537,7 @@ def main():
         elif args.mode == 'hold':
             # Wait for first heartbeat
             print("\n[WAIT] Waiting for first heartbeat...")
-            for _ in range(50):  # Wait up to 5 seconds
-                if client.is_arduino_online():
-                    break
-                time.sleep(0.1)
+            client._online_event.wait(timeout=5.0)  # Wait up to 5 seconds
 
             if client.is_arduino_online():
                 print("[OK] Arduino is online! Starting hold test...\n")
@@ -1017,10 +1552,9 @@ def main():
             try:
                 while True:
                     time.sleep(1)
-                    online = client.is_arduino_online()
-                    time_since = client.get_time_since_last_heartbeat()
+                    online, time_since, count = client.snapshot()
                     status_icon = "✓" if online else "✗"
-                    print(f"[{status_icon}] Heartbeats: {client.heartbeat_count}, "
+                    print(f"[{status_icon}] Heartbeats: {count}, "
                           f"Time since last: {time_since:.2f}s")
             except KeyboardInterrupt:
                 pass
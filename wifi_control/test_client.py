@@ -3,11 +3,30 @@
 Arduino Thruster WiFi Control - Client Script
 Connects to Arduino TCP server and sends/receives thruster commands
 """
+import collections
+import functools
+import re
+import selectors
 import socket
 import sys
 import time
 from threading import Thread
 
+# Status line: "S <mode> <left> <right>", or the fallback "S <left> <right>".
+# For the fallback group 2 is empty and group 1 holds the left value.
+_STATUS_RE = re.compile(rb'S (\d+)(?: (\d+))? (\d+)(?:\s|\Z)')
+
+# Linux-only; disables delayed ACKs until the kernel turns them back on
+_TCP_QUICKACK = getattr(socket, 'TCP_QUICKACK', None)
+
+# Linux socket priority for control traffic (0-6 need no privileges)
+_SO_PRIORITY = getattr(socket, 'SO_PRIORITY', None)
+
+@functools.lru_cache(maxsize=1024)
+def _encode_cmd(left_us, right_us):
+    """Return the shared command frame for a clamped (left, right) pair"""
+    return b"C %d %d\n" % (left_us, right_us)
+
 class ArduinoThrusterClient:
     def __init__(self, arduino_ip='192.168.50.100', arduino_port=8888):
         self.arduino_ip = arduino_ip
@@ -15,6 +34,15 @@ class ArduinoThrusterClient:
         self.sock = None
         self.connected = False
         self.last_status = None  # (mode, left_us, right_us) or (None, left, right)
+        self._sel = None  # Selector over the TCP socket and the wake socket
+        self._wake_r = self._wake_w = None  # disconnect() writes here to stop the reader
+        self._recv_thread = None
+        # Hand-off from the receive thread to main for printing: the newest
+        # status as one (sequence, status) tuple, swapped in a single store,
+        # and a bounded backlog of malformed lines
+        self._latest = (0, None)
+        self._seen_seq = 0
+        self._malformed = collections.deque(maxlen=16)
         
     def connect(self):
         """Connect to Arduino TCP server"""
@@ -23,8 +51,20 @@ class ArduinoThrusterClient:
             self.sock.settimeout(5.0)
             print(f"Connecting to Arduino at {self.arduino_ip}:{self.arduino_port}...")
             self.sock.connect((self.arduino_ip, self.arduino_port))
-            # After successful connect, use shorter timeout for responsive reads
+            # Commands are tiny and latency sensitive: send each one immediately
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if _TCP_QUICKACK is not None:
+                self.sock.setsockopt(socket.IPPROTO_TCP, _TCP_QUICKACK, 1)
+            if _SO_PRIORITY is not None:
+                self.sock.setsockopt(socket.SOL_SOCKET, _SO_PRIORITY, 6)
+            # Bounds sendall() so a stalled peer cannot hang the interactive
+            # loop; reads only happen once the selector reports the socket
+            # readable, so they never wait on it
             self.sock.settimeout(1.0)
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._sel = selectors.DefaultSelector()
+            self._sel.register(self.sock, selectors.EVENT_READ, 'data')
+            self._sel.register(self._wake_r, selectors.EVENT_READ, 'wake')
             try:
                 # Send a tiny handshake to ensure the server marks the client as connected
                 self.sock.sendall(b"HELLO\n")
@@ -45,9 +85,25 @@ class ArduinoThrusterClient:
             
     def disconnect(self):
         """Disconnect from Arduino"""
+        self.connected = False
+        if self._wake_w:
+            # Wake the receive thread out of select() so it exits promptly
+            try:
+                self._wake_w.send(b'\0')
+            except OSError:
+                pass
+        if self._recv_thread:
+            self._recv_thread.join(timeout=1.0)
+            self._recv_thread = None
+        if self._sel:
+            self._sel.close()
+            self._sel = None
+        if self._wake_r:
+            self._wake_r.close()
+            self._wake_w.close()
+            self._wake_r = self._wake_w = None
         if self.sock:
             self.sock.close()
-        self.connected = False
         print("Disconnected from Arduino")
         
     def send_command(self, left_us, right_us):
@@ -65,10 +121,8 @@ class ArduinoThrusterClient:
         left_us = max(1100, min(1900, left_us))
         right_us = max(1100, min(1900, right_us))
         
-        cmd = f"C {left_us} {right_us}\n"
-        
         try:
-            self.sock.sendall(cmd.encode())
+            self.sock.sendall(_encode_cmd(left_us, right_us))
             print(f"→ Sent: C {left_us} {right_us}")
             return True
         except Exception as e:
@@ -77,53 +131,201 @@ class ArduinoThrusterClient:
             return False
             
     def receive_status(self):
-        """Receive status from Arduino in background thread"""
-        buffer = ""
+        """Receive status from Arduino in background thread
+
+        The thread spends its idle time blocked in select() with the GIL
+        released, so it does not compete with the input() prompt. An asyncio
+        reader was considered, but input() and the blocking test sequence
+        would still need an executor thread, so it would not remove a thread.
+        """
+        # Receive straight into a reused buffer; complete lines are matched as bytes
+        # and only malformed status lines are ever decoded
+        buf = bytearray(4096)
+        mv = memoryview(buf)
+        pending = bytearray()
+        select = self._sel.select
         while self.connected:
             try:
-                data = self.sock.recv(256).decode('utf-8')
-                if not data:
+                # Block until data arrives or disconnect() writes the wake socket
+                events = select()
+                if any(key.data == 'wake' for key, _ in events):
+                    break
+                n = self.sock.recv_into(mv)
+                if not n:
                     print("\n✗ Connection closed by Arduino")
                     self.connected = False
                     break
                     
-                buffer += data
+                if _TCP_QUICKACK is not None:
+                    # Quick-ACK mode is not sticky; re-arm it after each read
+                    self.sock.setsockopt(socket.IPPROTO_TCP, _TCP_QUICKACK, 1)
+                    
+                pending += mv[:n]
+                # A full buffer means more may be queued: drain it before
+                # parsing, reading again only while the selector reports data
+                # so the socket timeout is never waited on here
+                while n == len(buf) and any(key.data == 'data' for key, _ in select(0)):
+                    n = self.sock.recv_into(mv)
+                    pending += mv[:n]
                 
                 # Process complete lines
-                while '\n' in buffer:
-                    line, buffer = buffer.split('\n', 1)
-                    if line.startswith('S '):
-                        parts = line.split()
-                        try:
-                            if len(parts) >= 4:
+                while True:
+                    i = pending.find(b'\n')
+                    if i < 0:
+                        break
+                    # Protocol is ASCII; only status lines are inspected, and
+                    # they are matched in place without copying the line out
+                    if pending.startswith(b'S '):
+                        m = _STATUS_RE.match(pending, 0, i)
+                        if m:
+                            first, second, right = m.groups()
+                            if second is not None:
                                 # Format: S <mode> <left> <right>
-                                mode = int(parts[1])
-                                left_us = int(parts[2])
-                                right_us = int(parts[3])
+                                mode = int(first)
+                                left_us = int(second)
+                                right_us = int(right)
                                 self.last_status = (mode, left_us, right_us)
-                                print(f"← Status: mode={mode} | Left={left_us}µs | Right={right_us}µs")
-                            elif len(parts) == 3:
+                            else:
                                 # Fallback: S <left> <right>
-                                left_us = int(parts[1])
-                                right_us = int(parts[2])
+                                left_us = int(first)
+                                right_us = int(right)
                                 self.last_status = (None, left_us, right_us)
-                                print(f"← Status: Left={left_us}µs | Right={right_us}µs")
-                        except ValueError:
-                            print(f"← Malformed status line: {line}")
+                            self._latest = (self._latest[0] + 1, self.last_status)
+                        else:
+                            self._malformed.append(bytes(pending[:i]))
+                    del pending[:i + 1]
                                 
-            except socket.timeout:
-                continue
             except Exception as e:
-                print(f"\n✗ Receive error: {e}")
+                if self.connected:
+                    print(f"\n✗ Receive error: {e}")
                 self.connected = False
                 break
                 
+    def drain_status(self):
+        """Return the newest status if it arrived since the last call, or None"""
+        seq, status = self._latest
+        if seq == self._seen_seq:
+            return None
+        self._seen_seq = seq
+        return status
+
+    def drain_malformed(self):
+        """Return the malformed status lines received since the last call
+
+        Only the most recent 16 are kept.
+        """
+        lines = []
+        try:
+            while True:
+                lines.append(self._malformed.popleft())
+        except IndexError:
+            pass
+        return lines
+
     def start_receive_thread(self):
         """Start receiving status in background"""
         thread = Thread(target=self.receive_status, daemon=True)
         thread.start()
+        self._recv_thread = thread
         return thread
 
+def print_status(status):
+    """Print a received (mode, left_us, right_us) status"""
+    mode, left_us, right_us = status
+    if mode is None:
+        print(f"← Status: Left={left_us}µs | Right={right_us}µs")
+    else:
+        print(f"← Status: mode={mode} | Left={left_us}µs | Right={right_us}µs")
+
+def print_pending(client):
+    """Print what the receive thread handed off since the last call"""
+    for line in client.drain_malformed():
+        print(f"← Malformed status line: {line.decode('ascii', 'replace').rstrip()}")
+    status = client.drain_status()
+    if status is not None:
+        print_status(status)
+
+def _show_help(client, parts):
+    """Print the interactive command list"""
+    print("\n=== Thruster Control Commands ===")
+    print("Commands:")
+    print("  C <left> <right>  - Send command (e.g., 'C 1500 1500')")
+    print("  stop              - Stop thrusters (1500 1500)")
+    print("  forward           - Full forward (1900 1900)")
+    print("  reverse           - Full reverse (1100 1100)")
+    print("  status            - Show last received status")
+    print("  test              - Run test sequence")
+    print("  help              - Show this list")
+    print("  quit              - Exit\n")
+
+def _show_status(client, parts):
+    """Print the last status received from the Arduino"""
+    if client.last_status is None:
+        print("No status received yet.")
+    else:
+        mode, left, right = client.last_status
+        if mode is None:
+            print(f"Last status: Left={left}µs | Right={right}µs")
+        else:
+            print(f"Last status: mode={mode} | Left={left}µs | Right={right}µs")
+
+def _run_test(client, parts):
+    """Step through a fixed command sequence, one second per step
+
+    Steps are scheduled on absolute monotonic deadlines so send and print
+    time does not accumulate across the sequence.
+    """
+    print("\n=== Running Test Sequence ===")
+    test_commands = [
+        (1500, 1500, "Stop"),
+        (1600, 1500, "Turn right"),
+        (1500, 1600, "Turn left"),
+        (1700, 1700, "Forward slow"),
+        (1900, 1900, "Forward full"),
+        (1100, 1100, "Reverse full"),
+        (1500, 1500, "Stop"),
+    ]
+    
+    t0 = time.monotonic()
+    for i, (left, right, desc) in enumerate(test_commands, 1):
+        print(f"\n{desc}...")
+        client.send_command(left, right)
+        time.sleep(max(0.0, t0 + i - time.monotonic()))
+        print_pending(client)
+    print("\nTest sequence complete\n")
+
+def _send_manual(client, parts):
+    """Handle 'C <left> <right>'"""
+    if len(parts) == 3:
+        try:
+            left = int(parts[1])
+            right = int(parts[2])
+            client.send_command(left, right)
+        except ValueError:
+            print("✗ Invalid values. Use: C <left_us> <right_us>")
+    else:
+        print("✗ Invalid format. Use: C <left_us> <right_us>")
+
+def _preset(left, right):
+    """Build a handler that sends a fixed command"""
+    def handler(client, parts):
+        client.send_command(left, right)
+    return handler
+
+# Interactive commands keyed on the first (lowercased) token. Each handler
+# takes (client, parts); a truthy return value ends the session.
+_HANDLERS = {
+    'quit': lambda client, parts: True,
+    'exit': lambda client, parts: True,
+    'stop': _preset(1500, 1500),
+    'forward': _preset(1900, 1900),
+    'reverse': _preset(1100, 1100),
+    'status': _show_status,
+    'test': _run_test,
+    'c': _send_manual,
+    'help': _show_help,
+}
+
 def main():
     """Main interactive control loop"""
     client = ArduinoThrusterClient()
@@ -135,15 +337,7 @@ def main():
     # Start receiving status in background
     client.start_receive_thread()
     
-    print("\n=== Thruster Control Commands ===")
-    print("Commands:")
-    print("  C <left> <right>  - Send command (e.g., 'C 1500 1500')")
-    print("  stop              - Stop thrusters (1500 1500)")
-    print("  forward           - Full forward (1900 1900)")
-    print("  reverse           - Full reverse (1100 1100)")
-    print("  status            - Show last received status")
-    print("  test              - Run test sequence")
-    print("  quit              - Exit\n")
+    _show_help(client, None)
     
     # Give time for receive thread to start
     time.sleep(0.5)
@@ -151,65 +345,19 @@ def main():
     try:
         while client.connected:
             try:
-                user_input = input("cmd> ").strip().lower()
+                # Status lines are printed here, between prompts, rather than
+                # from the receive thread
+                print_pending(client)
+                parts = input("cmd> ").strip().lower().split()
                 
-                if not user_input:
+                if not parts:
                     continue
                     
-                elif user_input == 'quit' or user_input == 'exit':
-                    break
-                    
-                elif user_input == 'stop':
-                    client.send_command(1500, 1500)
-                    
-                elif user_input == 'forward':
-                    client.send_command(1900, 1900)
-                    
-                elif user_input == 'reverse':
-                    client.send_command(1100, 1100)
-
-                elif user_input == 'status':
-                    if client.last_status is None:
-                        print("No status received yet.")
-                    else:
-                        mode, left, right = client.last_status
-                        if mode is None:
-                            print(f"Last status: Left={left}µs | Right={right}µs")
-                        else:
-                            print(f"Last status: mode={mode} | Left={left}µs | Right={right}µs")
-                    
-                elif user_input == 'test':
-                    print("\n=== Running Test Sequence ===")
-                    test_commands = [
-                        (1500, 1500, "Stop"),
-                        (1600, 1500, "Turn right"),
-                        (1500, 1600, "Turn left"),
-                        (1700, 1700, "Forward slow"),
-                        (1900, 1900, "Forward full"),
-                        (1100, 1100, "Reverse full"),
-                        (1500, 1500, "Stop"),
-                    ]
-                    
-                    for left, right, desc in test_commands:
-                        print(f"\n{desc}...")
-                        client.send_command(left, right)
-                        time.sleep(1)
-                    print("\nTest sequence complete\n")
-                    
-                elif user_input.startswith('c '):
-                    parts = user_input.split()
-                    if len(parts) == 3:
-                        try:
-                            left = int(parts[1])
-                            right = int(parts[2])
-                            client.send_command(left, right)
-                        except ValueError:
-                            print("✗ Invalid values. Use: C <left_us> <right_us>")
-                    else:
-                        print("✗ Invalid format. Use: C <left_us> <right_us>")
-                        
-                else:
+                handler = _HANDLERS.get(parts[0])
+                if handler is None:
                     print("✗ Unknown command. Type 'help' for commands.")
+                elif handler(client, parts):
+                    break
                     
             except KeyboardInterrupt:
                 print("\n")